@@ -1,54 +1,508 @@
 import argparse
 import csv
 import os
+import json
+import queue
 import re
+import sqlite3
 import sys
+import tarfile
+import threading
 import time
-import xml.etree.ElementTree as ET
-from urllib.parse import urljoin, quote, urlencode
+from datetime import timedelta
+from collections import Counter, deque, namedtuple
+from io import BytesIO
+from itertools import chain
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urljoin, quote, urlencode, urlsplit
+import msgpack
+import pandas as pd
+import xxhash
 import requests
+import requests_cache
+import zstandard
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 from tqdm import tqdm
 
-stats = {
-    # Stage 1 stats
-    'total_records': 0,
-    'records_with_isbn': 0,
-    'records_with_lccn': 0,
-    'records_with_both': 0,
-    'records_with_none': 0,
-    'errors_stage1': 0,
-    
-    # Stage 2 stats
-    'items_requiring_lookup': 0,
-    'successful_isbn_lookups': 0,
-    'successful_title_lookups': 0,
-    'failed_lookups': 0,
-    
-    # Stage 3 stats
-    'total_505_searches': 0,
-    'found_505': 0,
-    'empty_505': 0,
-    'missing_505': 0,
-    'errors_stage3': 0
-}
+# MARCXML comes namespaced from lccn.loc.gov, but match plain tags too.
+# Qualified tag names are precomputed once for the iterparse tag filter.
+_MARC_NS_URI = 'http://www.loc.gov/MARC21/slim'
+_MARC_DATAFIELD_TAGS = (f'{{{_MARC_NS_URI}}}datafield', 'datafield')
+_505_SUBFIELD_CODES = frozenset(('a', 'g', 't', 'r'))
+
+# Subfield-'a' value spans for one MARC tag on the OPAC record page; the
+# value itself is the span's tail text. Selecting only tags 020/010 here
+# skips the 20+ uninteresting MARC rows per record entirely.
+def _marc_subfield_a_xpath(tag):
+    return etree.XPath(
+        f"//th[contains(@class, 'marc_tag_col') and normalize-space(text())='{tag}']"
+        "/following-sibling::td[contains(@class, 'marc_subfields')]"
+        "//span[substring(normalize-space(text()), string-length(normalize-space(text())))='a']")
+
+_XPATH_ISBN_SPANS = _marc_subfield_a_xpath('020')
+_XPATH_LCCN_SPANS = _marc_subfield_a_xpath('010')
+
+# Sentinel returned by scrape_lccn_by_isbn when the search found no hits at
+# all (as opposed to a hit page that just lacked an LCCN element)
+NO_RESULTS = object()
+
+# Sentinel for a lookup that failed in transport (connection error or error
+# status after retries). Reported for this run but never written to the
+# persistent cache — the next run should retry, not replay the outage
+FAILED = object()
+
+# Stage 3 entries: a fixed four-field tuple instead of a dict per record.
+# Field order matches the output columns, so an entry concatenated with
+# (status, content) is exactly an output row.
+Record = namedtuple('Record', ('bibid', 'title', 'isbn', 'lccn'))
+
+def _normalize_title(title):
+    """Collapse runs of whitespace so equivalent titles share one memo/cache
+    key and one search request."""
+    return _WS_RE.sub(' ', title).strip()
+
+def _join_values(values):
+    """Join scraped values with '; '. Most records have 0 or 1 values, so
+    shortcut those cases instead of paying str.join's setup each time."""
+    if not values:
+        return ''
+    if len(values) == 1:
+        return values[0]
+    return '; '.join(values)
+
+# Compiled once at import; these run on every record
+_WS_RE = re.compile(r'\s+')
+_ISBN_CLEAN = re.compile(r'[^\dX]')
+_BIBID_NUM = re.compile(r'(\d+)')
+_LCCN_PERMALINK = re.compile(r'lccn\.loc\.gov/(\d+)')
+_LCCN_Z3988 = re.compile(r'rft\.lccn=(\d+)')
+_LCCN_DIGITS = re.compile(r'\b\d{8,}\b')
+
+# Byte-level fast paths over the raw response body; these run in re's C
+# engine without ever decoding the page
+_LCCN_PERMALINK_B = re.compile(rb'lccn\.loc\.gov/(\d+)')
+_Z3988_TITLE_B = re.compile(rb'<span[^>]*class="Z3988"[^>]*title="([^"]*)"', re.IGNORECASE)
+_LCCN_Z3988_B = re.compile(rb'rft\.lccn=(\d+)')
+_LCCN_ITEM_TITLE_B = re.compile(
+    rb'class="item-title"[^>]*>LCCN</h3>.*?<span[^>]*dir="ltr"[^>]*>\s*([^\s<]+)', re.DOTALL)
+
+# 505 contents can blow past the default 128 KiB csv field limit when the
+# output (or an intermediate) is read back in; lift it so nothing truncates.
+# sys.maxsize overflows the C long on Windows, so back off until accepted
+_limit = sys.maxsize
+while True:
+    try:
+        csv.field_size_limit(_limit)
+        break
+    except OverflowError:
+        _limit //= 2
+
+def parse_marc_html(content):
+    """Extract ('; '-joined) ISBN and LCCN strings from an OPAC MARC-HTML page.
+
+    Pure function of the page bytes — no session or CLI state — so it is
+    picklable and could be dispatched to a ProcessPoolExecutor unchanged if
+    parsing ever came to dominate over network time.
+    """
+    doc = lxml_html.fromstring(content)
+
+    isbns = []
+    lccns = []
+
+    for span in _XPATH_ISBN_SPANS(doc):  # 020
+        value = (span.tail or '').strip()
+        if value:
+            isbn = _ISBN_CLEAN.sub('', value)
+            if isbn:
+                isbns.append(isbn)
+
+    for span in _XPATH_LCCN_SPANS(doc):  # 010
+        value = (span.tail or '').strip()
+        if value:
+            # Split to get the first part (before any '/')
+            lccn = value.split()[0].strip()
+            if lccn:
+                lccns.append(lccn)
+
+    # Join once here rather than per consumer; from this point the values
+    # travel as plain '; '-separated strings
+    return _join_values(isbns), _join_values(lccns)
+
+class ResultCache:
+    """Sqlite-backed cache for extracted lookup results.
+
+    Sits above the HTTP cache: a hit here skips not just the network but
+    also the HTML/XML parsing. Keys are namespaced strings such as
+    'lccn:isbn:<isbn>' or 'marc505:<lccn>'; values are anything JSON can
+    round-trip.
+    """
+
+    def __init__(self, path, ttl_seconds):
+        self.ttl = ttl_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value BLOB, ts INTEGER, etag TEXT)")
+        try:
+            # Caches created before the etag column existed
+            self.conn.execute("ALTER TABLE cache ADD COLUMN etag TEXT")
+        except sqlite3.OperationalError:
+            pass
+        self.conn.commit()
+
+    def get(self, key):
+        """Return (found, value); expired entries count as misses."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, ts FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False, None
+        value, ts = row
+        if self.ttl and time.time() - ts > self.ttl:
+            return False, None
+        return True, json.loads(value)
+
+    def get_entry(self, key):
+        """Return (value, etag, fresh). Unlike get(), an expired entry still
+        returns its value (with fresh=False) so the caller can revalidate it
+        with a conditional request instead of refetching from scratch."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, ts, etag FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, None, False
+        value, ts, etag = row
+        fresh = not self.ttl or time.time() - ts <= self.ttl
+        return json.loads(value), etag, fresh
+
+    def set(self, key, value, etag=None):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, ts, etag) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), int(time.time()), etag))
+            self.conn.commit()
+
+    def touch(self, key):
+        """Restart the TTL clock, e.g. after a 304 revalidated the entry."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE cache SET ts = ? WHERE key = ?", (int(time.time()), key))
+            self.conn.commit()
+
+class MsgpackWriter:
+    """Writer for the per-stage intermediate artifacts.
+
+    Rows are msgpack-encoded dicts in a zstd-compressed stream: no quoting
+    or escaping work per field, embedded newlines in values survive as-is,
+    and the artifacts take a fraction of the CSV size on disk. Only the
+    stage-to-stage hand-offs use this; the final --output stays CSV.
+    """
+
+    def __init__(self, path, append=False):
+        self.file = open(path, 'ab' if append else 'wb')
+        self.stream = zstandard.ZstdCompressor().stream_writer(self.file)
+
+    def write(self, row):
+        self.stream.write(msgpack.packb(row, use_bin_type=True))
+
+    def flush(self):
+        # Close out a frame so everything written so far stays readable
+        # even if the process dies before close()
+        self.stream.flush(zstandard.FLUSH_FRAME)
+
+    def close(self):
+        self.stream.close()
+        self.file.close()
+
+def iter_stage_rows(path):
+    """Yield row dicts from a stage artifact.
+
+    Our own intermediates are zstd-compressed msgpack streams; anything
+    else (user-supplied inputs via --skip-*) is read as CSV.
+    """
+    if path.endswith('.zst'):
+        with open(path, 'rb') as file:
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                file, read_across_frames=True)
+            yield from msgpack.Unpacker(reader, raw=False)
+    else:
+        with open(path, 'r', newline='', encoding='utf-8') as file:
+            yield from csv.DictReader(file)
+
+class RowWriter:
+    """Single writer thread that batches CSV rows from many producers.
+
+    Fetch workers only ever queue rows; one thread drains the queue and
+    writes them with writerows in batches, flushing periodically, so file
+    writes never serialize the fetch pool and each batch hits the file
+    atomically. The progress bar (if given) advances as rows are durably
+    written, not merely produced.
+    """
+
+    _STOP = object()
+
+    def __init__(self, writer, csv_file, pbar=None, batch_size=64, flush_every=2.0):
+        self.writer = writer
+        self.csv_file = csv_file
+        self.pbar = pbar
+        self.batch_size = batch_size
+        self.flush_every = flush_every
+        self.queue = queue.Queue(maxsize=10000)
+        self.thread = threading.Thread(target=self._loop, name="row-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, row):
+        self.queue.put(row)
+
+    def close(self):
+        """Flush remaining rows and stop the writer thread."""
+        self.queue.put(self._STOP)
+        self.thread.join()
+
+    def _loop(self):
+        batch = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                item = None
+
+            stop = item is self._STOP
+            if item is not None and not stop:
+                batch.append(item)
+
+            now = time.monotonic()
+            if batch and (stop or len(batch) >= self.batch_size
+                          or now - last_flush >= self.flush_every):
+                self.writer.writerows(batch)
+                self.csv_file.flush()
+                if self.pbar is not None:
+                    self.pbar.update(len(batch))
+                batch.clear()
+                last_flush = now
+
+            if stop:
+                return
+
+class DebugDumper:
+    """Background writer for --debug MARCXML dumps.
+
+    Workers queue (name, bytes) pairs and move on; one thread appends them
+    to a single zstd-compressed tar. Debug runs skip the per-record
+    open/write/close on the fetch path, and the XML lands on disk at a
+    fraction of its raw size.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.stream = zstandard.ZstdCompressor().stream_writer(self.file)
+        self.tar = tarfile.open(mode='w|', fileobj=self.stream)
+        self.queue = queue.Queue(maxsize=256)
+        self.thread = threading.Thread(target=self._loop, name="debug-dump", daemon=True)
+        self.thread.start()
+
+    def put(self, name, data):
+        self.queue.put((name, data))
+
+    def close(self):
+        """Drain the queue and finalize the archive."""
+        self.queue.put(self._STOP)
+        self.thread.join()
+        self.tar.close()
+        self.stream.close()
+        self.file.close()
+
+    def _loop(self):
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                return
+            name, data = item
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self.tar.addfile(info, BytesIO(data))
+
+class TokenBucket:
+    """Thread-safe token bucket enforcing a shared request rate.
+
+    With concurrent workers a per-worker sleep multiplies the request rate
+    by the worker count; a shared bucket keeps the true rate at `rate`
+    requests per second no matter how many threads fetch.
+    """
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def refund(self):
+        """Return a token, e.g. when the request was served from cache."""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def set_rate(self, rate):
+        """Adjust the refill rate, e.g. from server rate-limit headers."""
+        with self.lock:
+            self.rate = rate
+
+class HostRateLimiter:
+    """One token bucket per host, adapted from the server's own headers.
+
+    Every host starts at the --delay rate, which stays the ceiling: header
+    feedback can only slow a host down further. When a response carries
+    X-RateLimit-Remaining/X-RateLimit-Reset, the bucket's rate is retuned
+    so the remaining allowance is spread evenly across the window instead
+    of being burned early and answered with 429s. (Retry-After on an
+    actual 429 is already honored by the urllib3 Retry policy.)
+    """
+
+    def __init__(self, rate):
+        self.max_rate = rate
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def _bucket(self, url):
+        host = urlsplit(url).hostname
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.max_rate)
+            return bucket
+
+    def acquire(self, url):
+        self._bucket(url).acquire()
+
+    def refund(self, url):
+        self._bucket(url).refund()
+
+    def observe(self, url, response):
+        """Retune the host's bucket from the response's rate-limit headers."""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = float(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+
+        # Reset is either epoch seconds or seconds-until-reset
+        window = reset - time.time() if reset > 1e9 else reset
+        if window <= 0:
+            return
+        # An exhausted allowance still gets a tiny positive rate so waiters
+        # wake up around the reset instead of dividing by zero
+        self._bucket(url).set_rate(min(self.max_rate, max(remaining, 1.0) / window))
 
 class CatalogProcessor:
     
     def __init__(self, args):
         self.args = args
-        self.session = requests.Session()
+
+        # Hot loops read these constantly; cache them as plain attributes
+        # instead of going through the argparse Namespace each time
+        self.verbose = args.verbose
+        self.debug = args.debug
+        self.delay = float(args.delay)
+        self.max_retries = int(args.max_retries)
+        self.concurrency = int(args.concurrency)
+
+        self.temp_dir = os.path.join(os.path.dirname(args.output), "temp")
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+        if args.no_cache:
+            self.session = requests.Session()
+        else:
+            # Persistent response cache: repeat runs (and reruns after partial
+            # failures) hit disk instead of re-fetching from LC/the OPAC
+            self.session = requests_cache.CachedSession(
+                cache_name=os.path.join(self.temp_dir, "http_cache"),
+                backend="sqlite",
+                expire_after=timedelta(days=30),
+                allowable_codes=(200,),
+                allowable_methods=("GET",)
+            )
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                         "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+                         "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            # Explicit, though requests defaults to this: keep payloads
+            # compressed on the wire
+            "Accept-Encoding": "gzip, deflate"
         })
-        
-        self.temp_dir = os.path.join(os.path.dirname(args.output), "temp")
-        os.makedirs(self.temp_dir, exist_ok=True)
-        
+
+        # Pool connections so repeated requests to the same hosts reuse
+        # sockets, and let urllib3 drive the retry policy below the Python
+        # layer: exponential backoff on 429/5xx, honoring Retry-After
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=32)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Per-host buckets shared by every worker thread: --delay caps each
+        # host's request rate, and rate-limit headers can lower it further
+        self.limiter = HostRateLimiter(rate=1.0 / self.delay) if self.delay > 0 else None
+
+        # In-process memo caches: catalogs repeat ISBNs/LCCNs (multivolume
+        # sets, shared LCCNs), so never fetch the same key twice in one run
+        self.isbn_to_lccn = {}
+        self.title_to_lccn = {}
+        self.lccn_to_505 = {}
+
+        # Persistent result cache so repeat runs skip parsing as well as
+        # fetching; shares the --no-cache switch with the HTTP cache
+        if args.no_cache:
+            self.result_cache = None
+        else:
+            cache_path = args.cache_path or os.path.join(self.temp_dir, "result_cache.sqlite")
+            self.result_cache = ResultCache(cache_path, ttl_seconds=args.cache_ttl * 86400)
+
+        # --debug dumps go to one compressed archive via a background
+        # thread instead of one file write per record on the fetch path
+        self.debug_dump = DebugDumper(
+            os.path.join(self.temp_dir, "debug_xml.tar.zst")) if self.debug else None
+
+        # Run totals for the final summary. Workers never touch this
+        # directly: each stage driver accumulates a local Counter and merges
+        # it here once, so no counting update is ever shared between threads
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
         filename = os.path.splitext(os.path.basename(args.output))[0]
-        self.stage1_output = os.path.join(self.temp_dir, f"{filename}_stage1.csv")
-        self.stage2_output = os.path.join(self.temp_dir, f"{filename}_stage2.csv")
+        self.stage1_output = os.path.join(self.temp_dir, f"{filename}_stage1.msgpack.zst")
+        self.stage2_output = os.path.join(self.temp_dir, f"{filename}_stage2.msgpack.zst")
         
     def run(self):
         try:
@@ -56,41 +510,50 @@ class CatalogProcessor:
                 print(f"Error: Input file '{self.args.input}' not found.")
                 return 1
             
-            # Stage 1
-            if not self.args.skip_stage1:
-                print("\n===== STAGE 1: Extracting ISBNs/LCCNs from catalog =====")
-                success = self.run_stage1()
-                if not success:
-                    print("Stage 1 failed. Cannot proceed to Stage 2.")
-                    return 1
-                stage2_input = self.stage1_output
-            else:
-                print("\n===== STAGE 1: Skipped =====")
-                stage2_input = self.args.input
-            
-            # Stage 2
-            if not self.args.skip_stage2:
-                print("\n===== STAGE 2: Looking up missing LCCNs from LC =====")
-                success = self.run_stage2(stage2_input)
-                if not success:
-                    print("Stage 2 failed. Cannot proceed to Stage 3.")
-                    return 1
-                stage3_input = self.stage2_output
-            else:
-                print("\n===== STAGE 2: Skipped =====")
-                stage3_input = stage2_input if not self.args.skip_stage1 else self.args.input
-            
-            # Stage 3
-            if not self.args.skip_stage3:
-                print("\n===== STAGE 3: Retrieving 505 fields from LC =====")
-                success = self.run_stage3(stage3_input)
-                if not success:
-                    print("Stage 3 failed.")
+            skip_any = self.args.skip_stage1 or self.args.skip_stage2 or self.args.skip_stage3
+
+            if not self.args.no_pipeline and not skip_any:
+                # Default: stream records stage-to-stage so Stage 3 starts on
+                # the first record as soon as Stages 1/2 have finished with it
+                if not self.run_pipeline():
+                    print("Pipeline failed.")
                     return 1
             else:
-                print("\n===== STAGE 3: Skipped =====")
-            
-            self.print_summary()
+                # Stage 1
+                if not self.args.skip_stage1:
+                    print("\n===== STAGE 1: Extracting ISBNs/LCCNs from catalog =====")
+                    success = self.run_stage1()
+                    if not success:
+                        print("Stage 1 failed. Cannot proceed to Stage 2.")
+                        return 1
+                    stage2_input = self.stage1_output
+                else:
+                    print("\n===== STAGE 1: Skipped =====")
+                    stage2_input = self.args.input
+
+                # Stage 2
+                if not self.args.skip_stage2:
+                    print("\n===== STAGE 2: Looking up missing LCCNs from LC =====")
+                    success = self.run_stage2(stage2_input)
+                    if not success:
+                        print("Stage 2 failed. Cannot proceed to Stage 3.")
+                        return 1
+                    stage3_input = self.stage2_output
+                else:
+                    print("\n===== STAGE 2: Skipped =====")
+                    stage3_input = stage2_input if not self.args.skip_stage1 else self.args.input
+
+                # Stage 3
+                if not self.args.skip_stage3:
+                    print("\n===== STAGE 3: Retrieving 505 fields from LC =====")
+                    success = self.run_stage3(stage3_input)
+                    if not success:
+                        print("Stage 3 failed.")
+                        return 1
+                else:
+                    print("\n===== STAGE 3: Skipped =====")
+
+            self.print_summary(self.stats)
             
             if self.args.clean_temp:
                 print("\nCleaning up temporary files...")
@@ -111,9 +574,213 @@ class CatalogProcessor:
             import traceback
             traceback.print_exc()
             return 1
+        finally:
+            if self.debug_dump:
+                # Finalize the archive even on failure so what was dumped
+                # stays readable
+                self.debug_dump.close()
+
+    def _merge_stats(self, local):
+        """Fold a stage's local Counter into the run totals."""
+        with self.stats_lock:
+            self.stats.update(local)
+
+    @staticmethod
+    def _count_stage1(counts, scraped_data, error):
+        has_isbn = bool(scraped_data['isbns'])
+        has_lccn = bool(scraped_data['lccns'])
+
+        if error:
+            counts['errors_stage1'] += 1
+        elif has_isbn and has_lccn:
+            counts['records_with_both'] += 1
+            counts['records_with_isbn'] += 1
+            counts['records_with_lccn'] += 1
+        elif has_isbn:
+            counts['records_with_isbn'] += 1
+        elif has_lccn:
+            counts['records_with_lccn'] += 1
+        else:
+            counts['records_with_none'] += 1
+
+    @staticmethod
+    def _count_stage2(counts, status):
+        if status in ('found_isbn', 'found_title', 'failed'):
+            counts['items_requiring_lookup'] += 1
+        if status == 'found_isbn':
+            counts['successful_isbn_lookups'] += 1
+        elif status == 'found_title':
+            counts['successful_title_lookups'] += 1
+        elif status == 'failed':
+            counts['failed_lookups'] += 1
+
+    def run_pipeline(self):
+        """Run all three stages as one streaming pipeline.
+
+        Records flow stage-to-stage through bounded queues as soon as they
+        are individually ready, so Stage 3 starts fetching MARCXML while
+        Stage 1 is still scraping and total wall time approaches the slowest
+        stage instead of the sum of all three. No intermediate files are
+        written in this mode; use --no-pipeline to get the staged behavior.
+        """
+        print("\n===== PIPELINE: Running all three stages concurrently =====")
+
+        records, error = self.parse_csv(self.args.input)
+        if error:
+            print(f"Error parsing CSV: {error}")
+            return False
+
+        print(f"Found {len(records)} records to process.")
+        self.stats['total_records'] = len(records)
+
+        q12 = queue.Queue(maxsize=128)
+        q23 = queue.Queue(maxsize=128)
+        window = self.concurrency * 2
+        failed = threading.Event()
+
+        def stage1_worker():
+            local = Counter()
+            try:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                    for record, scraped_data, error in \
+                            self.imap_bounded(executor, self.scrape_catalog_worker, records, window):
+                        self._count_stage1(local, scraped_data, error)
+                        q12.put({
+                            'BibID': record['bibid'],
+                            'Title': record['title'],
+                            'ISBN': scraped_data['isbns'],
+                            'LCCN': scraped_data['lccns']
+                        })
+            except Exception as e:
+                tqdm.write(f"Error in pipeline Stage 1: {e}")
+                local['errors_stage1'] += 1
+                failed.set()
+            finally:
+                self._merge_stats(local)
+                q12.put(None)
+
+        def stage2_worker():
+            local = Counter()
+            try:
+                upstream = iter(q12.get, None)
+                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                    for output_record, status in \
+                            self.imap_bounded(executor, self.lookup_lccn_worker, upstream, window):
+                        if output_record is None:
+                            continue
+                        self._count_stage2(local, status)
+                        # Match the staged flow: Stage 3 only sees records
+                        # that ended up with a title and an LCCN
+                        if output_record['Title'] and output_record['LCCN']:
+                            q23.put(Record(output_record['BibID'],
+                                           output_record['Title'],
+                                           output_record['ISBN'],
+                                           output_record['LCCN']))
+            except Exception as e:
+                tqdm.write(f"Error in pipeline Stage 2: {e}")
+                failed.set()
+                # Keep draining upstream: with q12 full, Stage 1 would
+                # otherwise block forever on put() and never be joinable
+                for _ in iter(q12.get, None):
+                    pass
+            finally:
+                self._merge_stats(local)
+                q23.put(None)
+
+        t1 = threading.Thread(target=stage1_worker, name="stage1", daemon=True)
+        t2 = threading.Thread(target=stage2_worker, name="stage2", daemon=True)
+        t1.start()
+        t2.start()
+
+        # Stage 3 runs in the main thread and owns the final output CSV
+        self.process_505_entries(iter(q23.get, None))
+
+        t1.join()
+        t2.join()
+        return not failed.is_set()
+
+    @staticmethod
+    def imap_bounded(executor, fn, iterable, window, ordered=True):
+        """Like executor.map, but keeps at most `window` tasks in flight.
+
+        Lets the input be streamed (e.g. straight from a csv reader) with
+        bounded memory instead of submitting every task up front. With
+        ordered=False, results are yielded as they complete, so one slow
+        task never stalls the results (or the submission of new work)
+        behind it.
+        """
+        if ordered:
+            pending = deque()
+            for item in iterable:
+                pending.append(executor.submit(fn, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        else:
+            pending = set()
+            for item in iterable:
+                pending.add(executor.submit(fn, item))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def _cached_lookup(self, key, fn):
+        """Run fn() with persistent result caching under the given key."""
+        if self.result_cache:
+            found, value = self.result_cache.get(key)
+            if found:
+                return NO_RESULTS if value == '__no_results__' else value
+
+        value = fn()
+
+        # Persist only outcomes derived from a successful response; a
+        # transient failure must not become a durable negative result
+        if self.result_cache and value is not FAILED:
+            self.result_cache.set(key, '__no_results__' if value is NO_RESULTS else value)
+        return value
+
+    # HTTP helpers
+
+    def request_with_retries(self, url, params=None, timeout=(5, 30), stream=False,
+                             headers=None):
+        """GET through the session; the urllib3 Retry policy on the adapter
+        handles backoff, 429/5xx retries and Retry-After below this layer.
+
+        `timeout` is a (connect, read) tuple so a dead host fails fast
+        without shortening the read window for slow-but-live responses.
+
+        Returns the response (possibly a 4xx/5xx for the caller to handle),
+        or None if every attempt failed at the connection level.
+        """
+        if self.limiter:
+            self.limiter.acquire(url)
+
+        try:
+            response = self.session.get(url, params=params, timeout=timeout, stream=stream,
+                                        headers=headers)
+        except requests.RequestException as e:
+            if self.verbose:
+                tqdm.write(f"Request failed: {e}")
+            return None
+
+        if self.limiter:
+            # Cache hits never touched the network; give the token back so
+            # a fully-cached run isn't rate-limited
+            if getattr(response, 'from_cache', False):
+                self.limiter.refund(url)
+            else:
+                self.limiter.observe(url, response)
+
+        return response
 
     # STAGE 1: OPAC scrape
-    
+
     def run_stage1(self):
         try:
             print(f"Parsing input CSV file: {self.args.input}")
@@ -124,62 +791,50 @@ class CatalogProcessor:
                 return False
             
             print(f"Found {len(records)} records to process.")
-            stats['total_records'] = len(records)
-            
-            print(f"Processing records with {self.args.delay}s delay between requests...")
-            results, _ = self.process_catalog_records(records, self.args.delay)
-            
-            error = self.save_stage1_results(results, self.stage1_output)
-            if error:
-                print(error)
-                return False
-            
+            self.stats['total_records'] = len(records)
+
+            print(f"Processing records with {self.delay}s delay between requests...")
+            self.process_catalog_records(records, self.delay)
+
             print(f"Stage 1 results saved to {self.stage1_output}")
             return True
-            
+
         except Exception as e:
             print(f"Error in Stage 1: {e}")
-            stats['errors_stage1'] += 1
+            self.stats['errors_stage1'] += 1
             return False
     
     def parse_csv(self, file_path):
-        records = []
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                headers = next(reader, None)
-                
-                # find the index of the bibid and title columns
-                bibid_col = None
-                title_col = None
-                
-                for i, header in enumerate(headers):
-                    if header and "BibID" in header:
-                        bibid_col = i
-                    elif header and "title" in header.lower():
-                        title_col = i
-                
-                if bibid_col is None or title_col is None:
-                    return [], "Could not find BibID and/or title columns in the CSV file."
-                
-                for row in reader:
-                    if len(row) > max(bibid_col, title_col):
-                        bibid = row[bibid_col].strip()
-                        title = row[title_col].strip()
-                        
-                        if bibid:
-                            bibid_match = re.search(r'(\d+)', bibid)
-                            if bibid_match:
-                                bibid = bibid_match.group(1)
-                            
-                            records.append({
-                                'bibid': bibid,
-                                'title': title
-                            })
-            
+            df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+
+            # find the bibid and title columns
+            bibid_col = None
+            title_col = None
+
+            for header in df.columns:
+                if "BibID" in header:
+                    bibid_col = header
+                elif "title" in header.lower():
+                    title_col = header
+
+            if bibid_col is None or title_col is None:
+                return [], "Could not find BibID and/or title columns in the CSV file."
+
+            # Vectorized normalization: strip both columns and reduce each
+            # BibID to its first digit run in one C pass per column instead
+            # of a regex search per row
+            bibids = df[bibid_col].str.strip()
+            titles = df[title_col].str.strip()
+            bibids = bibids.str.extract(_BIBID_NUM, expand=False).fillna(bibids)
+
+            keep = bibids.str.len() > 0
+            records = [{'bibid': bibid, 'title': title}
+                       for bibid, title in zip(bibids[keep], titles[keep])]
+
             if not records:
                 return [], "No valid records found in the CSV file."
-            
+
             return records, None
         except Exception as e:
             return [], f"Error parsing CSV: {str(e)}"
@@ -188,128 +843,114 @@ class CatalogProcessor:
         url = f"https://islandpines.roblib.upei.ca/eg/opac/record/{bibid}?expand=marchtml#marchtml"
         
         try:
-            response = requests.get(url, timeout=10)
+            response = self.request_with_retries(url, timeout=(5, 10))
+            if response is None:
+                raise requests.RequestException("request failed after retries")
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            isbns = []
-            lccns = []
-            
-            # Look specifically for each tag by number in the marc_tag_col elements
-            tag_cols = soup.find_all('th', class_='marc_tag_col')
-            
-            for tag_col in tag_cols:
-                tag_text = tag_col.get_text().strip()
-                
-                # Find the parent row and then the subfields column
-                if tag_text == '020':  # ISBN
-                    row = tag_col.parent
-                    subfields_td = row.find('td', class_='marc_subfields')
-                    if subfields_td:
-                        # find subfield 'a'
-                        for span in subfields_td.find_all('span'):
-                            span_text = span.get_text().strip()
-                            if span_text.endswith('a'):
-                                value = span.next_sibling.strip()
-                                # Clean ISBN
-                                isbn = re.sub(r'[^\dX]', '', value)
-                                if isbn:
-                                    isbns.append(isbn)
-                
-                elif tag_text == '010':  # LCCN
-                    row = tag_col.parent
-                    subfields_td = row.find('td', class_='marc_subfields')
-                    if subfields_td:
-                        # find subfield 'a'
-                        for span in subfields_td.find_all('span'):
-                            span_text = span.get_text().strip()
-                            if span_text.endswith('a'):
-                                value = span.next_sibling.strip()
-                                # Split to get the first part (before any '/')
-                                lccn = value.split()[0].strip()
-                                if lccn:
-                                    lccns.append(lccn)
-            
+
+            isbns, lccns = parse_marc_html(response.content)
+
             return {
                 'isbns': isbns,
                 'lccns': lccns
             }, None
-        
+
         except Exception as e:
-            if self.args.verbose:
+            if self.verbose:
                 import traceback
-                print(f"Error scraping {bibid}: {str(e)}")
-                print(traceback.format_exc())
+                tqdm.write(f"Error scraping {bibid}: {str(e)}")
+                tqdm.write(traceback.format_exc())
             return {
-                'isbns': [],
-                'lccns': []
+                'isbns': '',
+                'lccns': ''
             }, str(e)
 
+    def scrape_catalog_worker(self, record):
+        """Worker for one catalog record."""
+        scraped_data, error = self.scrape_catalog_record(record['bibid'])
+        return record, scraped_data, error
+
+    def load_completed_bibids(self):
+        """BibIDs already written to the Stage 1 output by an interrupted run.
+
+        A crash can leave a torn frame at the tail of the artifact; rows
+        appended after it would be unreadable on every later run. When the
+        read stops early, the artifact is rewritten from its readable rows
+        so the resume appends to a clean file.
+        """
+        done = set()
+        if not os.path.exists(self.stage1_output):
+            return done
+
+        rows = []
+        intact = True
+        try:
+            for row in iter_stage_rows(self.stage1_output):
+                rows.append(row)
+                bibid = (row.get('BibID') or '').strip()
+                if bibid:
+                    done.add(bibid)
+        except Exception:
+            intact = False
+
+        if not intact:
+            print(f"Stage 1 output ends in a torn frame; rewriting "
+                  f"{len(rows)} readable records before resuming")
+            writer = MsgpackWriter(self.stage1_output)
+            try:
+                for row in rows:
+                    writer.write(row)
+            finally:
+                writer.close()
+
+        return done
+
     def process_catalog_records(self, records, delay=1):
-        results = []
-        
-        pbar = tqdm(total=len(records), desc="Scraping catalog records", unit="record")
-        
-        for record in records:
-            time.sleep(delay)
-            
-            scraped_data, error = self.scrape_catalog_record(record['bibid'])
-            
-            result = {
-                'bibid': record['bibid'],
-                'title': record['title'],
-                'isbns': scraped_data['isbns'],
-                'lccns': scraped_data['lccns'],
-                'error': error
-            }
-            
-            # Update stats
-            has_isbn = len(scraped_data['isbns']) > 0
-            has_lccn = len(scraped_data['lccns']) > 0
-            
-            if error:
-                stats['errors_stage1'] += 1
-            elif has_isbn and has_lccn:
-                stats['records_with_both'] += 1
-                stats['records_with_isbn'] += 1
-                stats['records_with_lccn'] += 1
-            elif has_isbn:
-                stats['records_with_isbn'] += 1
-            elif has_lccn:
-                stats['records_with_lccn'] += 1
-            else:
-                stats['records_with_none'] += 1
-            
-            results.append(result)
-            pbar.update(1)
-        
-        pbar.close()
-        return results, stats
+        # Resume support: skip records already present in a previous partial
+        # output and append to it instead of starting over
+        done_bibids = self.load_completed_bibids()
+        if done_bibids:
+            print(f"Resuming Stage 1: {len(done_bibids)} records already in {self.stage1_output}")
+            records = [r for r in records if r['bibid'] not in done_bibids]
 
-    def save_stage1_results(self, results, output_file):
-        """Save results from Stage 1 to a CSV file."""
+        written = 0
+        writer = MsgpackWriter(self.stage1_output, append=bool(done_bibids))
         try:
-            with open(output_file, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                
-                writer.writerow(['BibID', 'Title', 'ISBN', 'LCCN', 'Error'])
-                
-                for record in results:
-                    isbns_str = '; '.join(record['isbns']) if record['isbns'] else ''
-                    lccns_str = '; '.join(record['lccns']) if record['lccns'] else ''
-                    error = record['error'] if 'error' in record and record['error'] else ''
-                    
-                    writer.writerow([
-                        record['bibid'],
-                        record['title'],
-                        isbns_str,
-                        lccns_str,
-                        error
-                    ])
-            return None
-        except Exception as e:
-            return f"Error saving results: {str(e)}"
+            pbar = tqdm(total=len(records), desc="Scraping catalog records", unit="record",
+                        disable=not sys.stderr.isatty())
+            local = Counter()
+
+            window = self.concurrency * 2
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for record, scraped_data, error in \
+                        self.imap_bounded(executor, self.scrape_catalog_worker, records, window):
+                    self._count_stage1(local, scraped_data, error)
+
+                    # Write as results arrive so a crash loses at most the
+                    # unflushed tail, not the whole stage
+                    writer.write({
+                        'BibID': record['bibid'],
+                        'Title': record['title'],
+                        'ISBN': scraped_data['isbns'],
+                        'LCCN': scraped_data['lccns'],
+                        'Error': error or ''
+                    })
+                    written += 1
+                    if written % 50 == 0:
+                        writer.flush()
+
+                    # Advance the bar in batches; per-record updates cost a
+                    # rate estimate and terminal write each
+                    if written % 64 == 0:
+                        pbar.update(64)
+
+            pbar.update(written % 64)
+            pbar.close()
+            self._merge_stats(local)
+        finally:
+            writer.close()
+
+        return written
 
     # STAGE 2: LCCN search
     
@@ -320,97 +961,61 @@ class CatalogProcessor:
                 print(f"Error: Input file '{input_file}' not found.")
                 return False
                 
-            with open(input_file, 'r', newline='', encoding='utf-8') as csv_in:
-                reader = csv.DictReader(csv_in)
-                
-                # check if required columns exist
-                required_columns = ['Title', 'ISBN', 'LCCN']
-                for col in required_columns:
-                    if col not in reader.fieldnames:
-                        print(f"Error: Required column '{col}' not found in input CSV.")
+            rows = iter_stage_rows(input_file)
+
+            # check if required columns exist (peek at the first row; the
+            # artifacts carry no header of their own)
+            first = next(rows, None)
+            if first is not None:
+                for col in ('Title', 'ISBN', 'LCCN'):
+                    if col not in first:
+                        print(f"Error: Required column '{col}' not found in input.")
                         return False
-                
-                records = list(reader)
-                
-            output_records = []
-            
-            for i, record in enumerate(records):
-                bibid = record.get('BibID', '')
-                title = record.get('Title', '')
-                isbn = record.get('ISBN', '')
-                lccn = record.get('LCCN', '')
-                
-                if not title:
-                    continue
-                    
-                # If LCCN already exists, keep it
-                if lccn and lccn.strip():
-                    output_records.append({
-                        'BibID': bibid,
-                        'Title': title,
-                        'ISBN': isbn,
-                        'LCCN': lccn.strip()
-                    })
-                    print(f"[{i+1}/{len(records)}] Item already has LCCN: {lccn}")
-                    continue
-                    
-                # If no ISBN, skip this lookup but keep the record
-                if not isbn or not isbn.strip():
-                    output_records.append({
-                        'BibID': bibid,
-                        'Title': title,
-                        'ISBN': isbn,
-                        'LCCN': ''
-                    })
-                    print(f"[{i+1}/{len(records)}] Item has no ISBN, skipping lookup: {title}")
-                    continue
-                    
-                # Need to look up LCCN
-                stats['items_requiring_lookup'] += 1
-                print(f"[{i+1}/{len(records)}] Looking up LCCN for: {title}")
-                
-                # First try with ISBN
-                print(f"  Searching by ISBN: {isbn}")
-                found_lccn = self.scrape_lccn_by_isbn(isbn)
-                
-                # If ISBN search fails, try with title
-                if not found_lccn:
-                    print(f"  ISBN search failed, trying title search...")
-                    time.sleep(self.args.delay) 
-                    found_lccn = self.scrape_lccn_by_title(title)
-                    if found_lccn:
-                        stats['successful_title_lookups'] += 1
-                else:
-                    stats['successful_isbn_lookups'] += 1
-                
-                time.sleep(self.args.delay)
-                
-                if found_lccn:
-                    print(f"✓ Found LCCN: {found_lccn}")
-                    output_records.append({
-                        'BibID': bibid,
-                        'Title': title,
-                        'ISBN': isbn,
-                        'LCCN': found_lccn
-                    })
-                else:
-                    stats['failed_lookups'] += 1
-                    print(f"✗ LCCN not found for: {title}")
-                    # Still include in output but with empty LCCN
-                    output_records.append({
-                        'BibID': bibid,
-                        'Title': title,
-                        'ISBN': isbn,
-                        'LCCN': ''
-                    })
-            
-            # Write output
-            with open(self.stage2_output, 'w', newline='', encoding='utf-8') as csv_out:
-                fieldnames = ['BibID', 'Title', 'ISBN', 'LCCN']
-                writer = csv.DictWriter(csv_out, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(output_records)
-                
+                rows = chain([first], rows)
+
+            writer = MsgpackWriter(self.stage2_output)
+            try:
+                # Stream rows straight from the input and write each result as
+                # it arrives, so memory stays bounded for large catalogs
+                pbar = tqdm(desc="LCCN lookups", unit="rec",
+                            disable=not sys.stderr.isatty())
+                local = Counter()
+                done = 0
+
+                window = self.concurrency * 2
+                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                    for output_record, status in \
+                            self.imap_bounded(executor, self.lookup_lccn_worker, rows, window):
+                        if output_record is None:
+                            continue
+
+                        self._count_stage2(local, status)
+
+                        if self.verbose:
+                            if status == 'had_lccn':
+                                pbar.write(f"Item already has LCCN: {output_record['LCCN']}")
+                            elif status == 'no_isbn':
+                                pbar.write(f"Item has no ISBN, skipping lookup: {output_record['Title']}")
+                            elif status in ('found_isbn', 'found_title'):
+                                pbar.write(f"✓ Found LCCN: {output_record['LCCN']}")
+                            else:
+                                pbar.write(f"✗ LCCN not found for: {output_record['Title']}")
+
+                        writer.write(output_record)
+                        done += 1
+                        if done % 64 == 0:
+                            pbar.update(64)
+                            pbar.set_postfix(
+                                found=local['successful_isbn_lookups']
+                                    + local['successful_title_lookups'],
+                                failed=local['failed_lookups'])
+
+                pbar.update(done % 64)
+                pbar.close()
+                self._merge_stats(local)
+            finally:
+                writer.close()
+
             print(f"Stage 2 results saved to {self.stage2_output}")
             return True
             
@@ -420,8 +1025,97 @@ class CatalogProcessor:
             traceback.print_exc()
             return False
 
+    def lookup_lccn_worker(self, record):
+        """Worker for one Stage 2 record. Returns (output_record, status)."""
+        bibid = record.get('BibID', '')
+        title = record.get('Title', '')
+        isbn = record.get('ISBN', '')
+        lccn = record.get('LCCN', '')
+
+        if not title:
+            return None, 'skipped'
+
+        # If LCCN already exists, keep it
+        if lccn and lccn.strip():
+            return {
+                'BibID': bibid,
+                'Title': title,
+                'ISBN': isbn,
+                'LCCN': lccn.strip()
+            }, 'had_lccn'
+
+        # If no ISBN, skip this lookup but keep the record
+        if not isbn or not isbn.strip():
+            return {
+                'BibID': bibid,
+                'Title': title,
+                'ISBN': isbn,
+                'LCCN': ''
+            }, 'no_isbn'
+
+        # Need to look up LCCN; first try with ISBN
+        status = 'found_isbn'
+        if isbn in self.isbn_to_lccn:
+            found_lccn = self.isbn_to_lccn[isbn]
+        else:
+            found_lccn = self._cached_lookup(
+                f"lccn:isbn:{isbn}", lambda: self.scrape_lccn_by_isbn(isbn))
+            self.isbn_to_lccn[isbn] = found_lccn
+
+        # Only fall back to the title search when the ISBN search had no hits
+        # at all; a hit page without an LCCN element almost never resolves via
+        # title either, so skip those two extra requests
+        if found_lccn is NO_RESULTS:
+            clean_title = _normalize_title(title)
+            # Key the caches on a 64-bit hash of the title: integer compares
+            # in the memo dict and short fixed-size keys in sqlite, instead
+            # of hashing/storing arbitrarily long title strings
+            title_key = xxhash.xxh3_64_intdigest(clean_title.encode('utf-8'))
+            if title_key in self.title_to_lccn:
+                found_lccn = self.title_to_lccn[title_key]
+            else:
+                found_lccn = self._cached_lookup(
+                    f"lccn:title:{title_key}",
+                    lambda: self.scrape_lccn_by_title(clean_title))
+                self.title_to_lccn[title_key] = found_lccn
+            if found_lccn is FAILED:
+                found_lccn = None
+            status = 'found_title' if found_lccn else 'failed'
+        elif found_lccn is FAILED or not found_lccn:
+            found_lccn = None
+            status = 'failed'
+
+        return {
+            'BibID': bibid,
+            'Title': title,
+            'ISBN': isbn,
+            'LCCN': found_lccn or ''
+        }, status
+
     def extract_lccn_from_html(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if isinstance(html_content, str):
+            html_bytes = html_content.encode('utf-8', errors='replace')
+        else:
+            html_bytes = html_content
+
+        # Fast paths first: the LCCN usually shows up in a permalink URL, the
+        # Z3988 span's title attribute, or the LCCN item block, all of which
+        # a byte regex finds on the raw body without building a parse tree
+        match = _LCCN_PERMALINK_B.search(html_bytes)
+        if match:
+            return match.group(1).decode('ascii')
+
+        match = _Z3988_TITLE_B.search(html_bytes)
+        if match:
+            lccn_match = _LCCN_Z3988_B.search(match.group(1))
+            if lccn_match:
+                return lccn_match.group(1).decode('ascii')
+
+        match = _LCCN_ITEM_TITLE_B.search(html_bytes)
+        if match:
+            return match.group(1).decode('utf-8', errors='replace')
+
+        soup = BeautifulSoup(html_bytes, 'lxml')
         
         # try 1: Look for LCCN in the specific wrapper div
         lccn_wrappers = soup.find_all('div', class_='items-wrapper')
@@ -444,14 +1138,14 @@ class CatalogProcessor:
                 if item_desc:
                     permalink = item_desc.find('a', id='permalink')
                     if permalink and 'href' in permalink.attrs:
-                        lccn_match = re.search(r'lccn\.loc\.gov/(\d+)', permalink['href'])
+                        lccn_match = _LCCN_PERMALINK.search(permalink['href'])
                         if lccn_match:
                             return lccn_match.group(1)
         
         # try 3: Look for LCCN in the Z3988
         z3988_span = soup.find('span', class_='Z3988')
         if z3988_span and 'title' in z3988_span.attrs:
-            lccn_match = re.search(r'rft\.lccn=(\d+)', z3988_span['title'])
+            lccn_match = _LCCN_Z3988.search(z3988_span['title'])
             if lccn_match:
                 return lccn_match.group(1)
         
@@ -461,14 +1155,14 @@ class CatalogProcessor:
             for div in content_container.find_all('div'):
                 if 'LCCN' in div.text:
                     # Look for text that contains digits, likely to be the LCCN
-                    lccn_text = re.search(r'\b\d{8,}\b', div.text)
+                    lccn_text = _LCCN_DIGITS.search(div.text)
                     if lccn_text:
                         return lccn_text.group(0).strip()
         
         return None
 
     def scrape_lccn_by_isbn(self, isbn):
-        clean_isbn = re.sub(r'[^0-9X]', '', isbn)
+        clean_isbn = _ISBN_CLEAN.sub('', isbn)
         if not clean_isbn:
             return None
             
@@ -482,32 +1176,39 @@ class CatalogProcessor:
             "combine2": "and"
         }
         
-        for attempt in range(self.args.max_retries):
-            try:
-                response = self.session.get(base_url, params=params, timeout=30)
-                response.raise_for_status()
-                
-                return self.extract_lccn_from_html(response.text)
-                
-            except requests.RequestException as e:
-                if self.args.verbose:
-                    print(f"Request error (attempt {attempt+1}/{self.args.max_retries}): {e}")
-                if attempt < self.args.max_retries - 1:
-                    time.sleep(self.args.delay * (attempt + 1))  # Exponential backoff
-            
-            except Exception as e:
-                if self.args.verbose:
-                    print(f"Error processing ISBN {isbn}: {e}")
-                return None
-                
-        return None
+        try:
+            response = self.request_with_retries(base_url, params=params, timeout=(5, 30))
+            if response is None or not response.ok:
+                return FAILED
+
+            lccn = self.extract_lccn_from_html(response.content)
+            if lccn:
+                return lccn
+
+            # Distinguish "search found nothing" from "hit page without an
+            # LCCN element": hit pages carry browse-result links or the
+            # items-wrapper record blocks
+            html = response.content
+            if b'browse-result' not in html and b'items-wrapper' not in html:
+                return NO_RESULTS
+            return None
+
+        except requests.RequestException as e:
+            if self.verbose:
+                tqdm.write(f"Error processing ISBN {isbn}: {e}")
+            return FAILED
+
+        except Exception as e:
+            if self.verbose:
+                tqdm.write(f"Error processing ISBN {isbn}: {e}")
+            return None
 
     def scrape_lccn_by_title(self, title):
         if not title or not title.strip():
             return None
             
-        clean_title = title.strip()
-        
+        clean_title = _normalize_title(title)
+
         base_url = "https://catalog.loc.gov/vwebv/search"
         params = {
             "searchArg": clean_title,
@@ -517,318 +1218,350 @@ class CatalogProcessor:
         }
         
         try:
-            if self.args.verbose:
-                print(f"Searching by title: {clean_title}")
-            response = self.session.get(base_url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            result_table = soup.find('table', class_='browseList')
-            if result_table:
-                first_result = result_table.find('a', class_='browse-result')
-                if first_result and 'href' in first_result.attrs:
-                    detail_url = "https://catalog.loc.gov" + first_result['href']
-                    if self.args.verbose:
-                        print(f"Found first result, fetching details: {detail_url}")
-                    
-                    time.sleep(self.args.delay)
-                    
-                    detail_response = self.session.get(detail_url, timeout=30)
-                    detail_response.raise_for_status()
-                    
-                    return self.extract_lccn_from_html(detail_response.text)
-            else:
-                return self.extract_lccn_from_html(response.text)
+            if self.verbose:
+                tqdm.write(f"Searching by title: {clean_title}")
+            response = self.request_with_retries(base_url, params=params, timeout=(5, 30))
+            if response is None or not response.ok:
+                return FAILED
+
+            # lxml takes the raw bytes directly; no chardet-based decode
+            doc = lxml_html.fromstring(response.content)
+
+            results = doc.xpath(
+                "//table[contains(@class, 'browseList')]//a[contains(@class, 'browse-result')]")
+            if results:
+                href = results[0].get('href')
+                if href:
+                    detail_url = "https://catalog.loc.gov" + href
+                    if self.verbose:
+                        tqdm.write(f"Found first result, fetching details: {detail_url}")
+
+                    detail_response = self.request_with_retries(detail_url, timeout=(5, 30))
+                    if detail_response is None or not detail_response.ok:
+                        return FAILED
+
+                    return self.extract_lccn_from_html(detail_response.content)
+            elif not doc.xpath("//table[contains(@class, 'browseList')]"):
+                return self.extract_lccn_from_html(response.content)
                 
         except requests.RequestException as e:
-            if self.args.verbose:
-                print(f"Title search request error: {e}")
-        
+            if self.verbose:
+                tqdm.write(f"Title search request error: {e}")
+            return FAILED
+
         except Exception as e:
-            if self.args.verbose:
-                print(f"Error processing title search for '{title}': {e}")
-            
+            if self.verbose:
+                tqdm.write(f"Error processing title search for '{title}': {e}")
+
         return None
 
     # STAGE 3: 505s
     
     def run_stage3(self, input_file):
         try:
-            entries = self.read_lccn_file(input_file)
-            if not entries:
+            processed = self.process_505_entries(self.iter_lccn_entries(input_file))
+            if not processed:
                 print("No valid entries found for Stage 3.")
                 return False
-                
-            stats['total_505_searches'] = len(entries)
-            print(f"Found {len(entries)} entries to process for 505 field retrieval")
-            
-            self.process_505_entries(entries)
-            
+
             return True
-            
+
         except Exception as e:
             print(f"Error in Stage 3: {e}")
-            stats['errors_stage3'] += 1
+            self.stats['errors_stage3'] += 1
             import traceback
             traceback.print_exc()
             return False
 
-    def read_lccn_file(self, file_path):
-        """Read the file containing titles and LCCNs for 505 retrieval."""
-        entries = []
+    def iter_lccn_entries(self, file_path):
+        """Yield title/LCCN entries for 505 retrieval, streaming the input."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                
-                # Make sure we have title and LCCNs
-                if 'Title' not in reader.fieldnames or 'LCCN' not in reader.fieldnames:
-                    print("Error: Input file must have 'Title' and 'LCCN' columns.")
-                    return []
-                
-                for row in reader:
-                    title = row.get('Title', '').strip()
-                    lccn = row.get('LCCN', '').strip()
-                    bibid = row.get('BibID', '').strip()
-                    isbn = row.get('ISBN', '').strip()
-                    
-                    if title and lccn:
-                        entries.append({
-                            'Title': title, 
-                            'LCCN': lccn,
-                            'BibID': bibid,
-                            'ISBN': isbn
-                        })
+            rows = iter_stage_rows(file_path)
+
+            # Make sure we have title and LCCNs
+            first = next(rows, None)
+            if first is None:
+                return
+            if 'Title' not in first or 'LCCN' not in first:
+                print("Error: Input file must have 'Title' and 'LCCN' columns.")
+                return
+
+            for row in chain([first], rows):
+                title = (row.get('Title') or '').strip()
+                lccn = (row.get('LCCN') or '').strip()
+                bibid = (row.get('BibID') or '').strip()
+                isbn = (row.get('ISBN') or '').strip()
+
+                if title and lccn:
+                    yield Record(bibid, title, isbn, lccn)
         except Exception as e:
             print(f"Error reading LCCN file: {e}")
-            return []
-        
-        return entries
 
-    def fetch_marcxml(self, lccn):
+    def fetch_marcxml(self, lccn, etag=None):
+        """Open a streaming GET for a record's MARCXML.
+
+        Returns the (unread) response so the caller can feed the body
+        straight into the parser as it arrives; None when the server
+        answered with an error status; FAILED when the request itself
+        failed and the outcome must not be cached. With `etag`, the
+        request is conditional and a 304 (empty body, record unchanged)
+        is returned as-is. The caller owns closing the response.
+        """
         url = f"https://lccn.loc.gov/{lccn}/marcxml"
+        headers = {'If-None-Match': etag} if etag else None
         try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                return response.text
+            response = self.request_with_retries(url, timeout=(5, 30), stream=True,
+                                                 headers=headers)
+            if response is None:
+                if self.verbose:
+                    tqdm.write(f"  - Request failed after retries")
+                return FAILED
+            if response.status_code in (200, 304):
+                return response
             else:
-                if self.args.verbose:
-                    print(f"  - HTTP Status: {response.status_code}")
+                if self.verbose:
+                    tqdm.write(f"  - HTTP Status: {response.status_code}")
+                response.close()
                 return None
         except Exception as e:
-            print(f"Error fetching MARCXML for LCCN {lccn}: {e}")
-            return None
+            tqdm.write(f"Error fetching MARCXML for LCCN {lccn}: {e}")
+            return FAILED
 
     def save_xml_for_debugging(self, xml_content, lccn):
-        debug_dir = os.path.join(self.temp_dir, "debug_xml")
-        os.makedirs(debug_dir, exist_ok=True)
-        file_path = os.path.join(debug_dir, f"{lccn}.xml")
-        
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write(xml_content)
-        
-        print(f"  - Saved raw XML to {file_path}")
+        self.debug_dump.put(f"{lccn}.xml", xml_content)
+        if self.verbose:
+            tqdm.write(f"  - Queued raw XML for {self.debug_dump.path}")
+
+    def extract_505_field(self, source, lccn, counts):
+        """Extract 505 contents from `source`, a file-like object yielding
+        MARCXML bytes (a decoded `response.raw` or a BytesIO).
 
-    def extract_505_field(self, xml_content, lccn):
-        if not xml_content:
+        iterparse pulls from the stream as bytes arrive, so parsing
+        overlaps the download and the document is never fully buffered.
+        Errors are tallied into `counts`, the caller's per-record Counter.
+        """
+        if source is None:
             return None
-        
-        if self.args.debug:
-            self.save_xml_for_debugging(xml_content, lccn)
-        
+
         try:
-            namespaces = {
-                'marc': 'http://www.loc.gov/MARC21/slim',
-                '': ''  # Default namespace
-            }
-            
-            root = ET.fromstring(xml_content)
-            
-            if self.args.verbose:
-                print(f"  - XML Root tag: {root.tag}")
-                print(f"  - XML Root attributes: {root.attrib}")
-            
-            if '}' in root.tag:
-                ns = root.tag.split('}')[0] + '}'
-                if self.args.verbose:
-                    print(f"  - Detected namespace: {ns}")
-                namespaces['marc'] = ns[1:-1]  
-            
-            fields_505 = []
-            
-            # direct search
-            fields_505.extend(root.findall(".//datafield[@tag='505']"))
-            
-            # with namespace
-            if not fields_505:
-                fields_505.extend(root.findall(".//marc:datafield[@tag='505']", namespaces))
-            
-            # direct XPath
-            if not fields_505:
-                for elem in root.iter():
-                    if elem.tag.endswith('datafield') and elem.get('tag') == '505':
-                        fields_505.append(elem)
-            
-            if self.args.verbose:
-                print(f"  - Found {len(fields_505)} fields with tag 505")
-            
-            if not fields_505:
-                return None
-            
+            found_505 = 0
             all_contents = []
-            
-            for field_idx, field in enumerate(fields_505):
-                if self.args.verbose:
-                    print(f"  - Processing 505 field #{field_idx+1}")
-                    print(f"    - Field attributes: {field.attrib}")
-                
-                field_contents = []
-                
-                
-                subfields = field.findall("./subfield")
-                
-                if not subfields:
-                    subfields = field.findall("./marc:subfield", namespaces)
-                
-                if not subfields:
-                    for elem in field.iter():
-                        if elem.tag.endswith('subfield'):
-                            subfields.append(elem)
-                
-                if self.args.verbose:
-                    print(f"    - Found {len(subfields)} subfields")
-                
-                for subfield in subfields:
-                    code = subfield.get('code', '')
-                    
-                    if code in ['a', 'g', 't', 'r']:
-                        content = subfield.text or ""
-                        if content.strip():
-                            field_contents.append(content.strip())
-                
-                if field_contents:
-                    all_contents.append(" ".join(field_contents))
-            
+
+            # Stream-parse datafields only, clearing each one (and any
+            # already-parsed siblings) once visited, so memory stays flat
+            # however large the MARCXML gets
+            for _, field in etree.iterparse(source, tag=_MARC_DATAFIELD_TAGS):
+                # No early exit on leaving the 505s: tag order is MARC
+                # convention, not a guarantee, and records are small
+                if field.get('tag') == '505':
+                    found_505 += 1
+
+                    if self.verbose:
+                        tqdm.write(f"  - Processing 505 field #{found_505}")
+                        tqdm.write(f"    - Field attributes: {field.attrib}")
+
+                    field_contents = []
+                    for subfield in field:
+                        if subfield.get('code') in _505_SUBFIELD_CODES:
+                            content = subfield.text or ""
+                            if content.strip():
+                                field_contents.append(content.strip())
+
+                    if field_contents:
+                        all_contents.append(" ".join(field_contents))
+
+                field.clear()
+                while field.getprevious() is not None:
+                    del field.getparent()[0]
+
+            if self.verbose:
+                tqdm.write(f"  - Found {found_505} fields with tag 505")
+
+            if not found_505:
+                return None
+
             if all_contents:
                 return "\n".join(all_contents)
             else:
                 return ""
-                
+
         except Exception as e:
-            if self.args.verbose:
-                print(f"  - Error extracting 505 field: {e}")
+            if self.verbose:
+                tqdm.write(f"  - Error extracting 505 field: {e}")
                 import traceback
-                traceback.print_exc()
-            stats['errors_stage3'] += 1
+                tqdm.write(traceback.format_exc())
+            counts['errors_stage3'] += 1
             return None
         
-    def process_505_entries(self, entries):
-        with open(self.args.output, 'w', newline='', encoding='utf-8') as csv_file:
-            fieldnames = ['BibID', 'Title', 'ISBN', 'LCCN', 'Status', 'Content_505']
-            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            pbar = tqdm(total=len(entries), desc="Retrieving 505 fields", unit="record")
-            
-            for entry in entries:
-                title = entry['Title']
-                lccn = entry['LCCN']
-                bibid = entry['BibID']
-                isbn = entry['ISBN']
-                
-                if not lccn:
-                    writer.writerow({
-                        'BibID': bibid,
-                        'Title': title,
-                        'ISBN': isbn,
-                        'LCCN': lccn,
-                        'Status': "No LCCN available",
-                        'Content_505': ""
-                    })
-                    pbar.update(1)
-                    continue
-                    
-                if self.args.verbose:
-                    print(f"Searching for: {title} (LCCN: {lccn})")
-                
-                time.sleep(self.args.delay)
-                
-                xml_content = self.fetch_marcxml(lccn)
-                
-                if xml_content is None:
-                    status = "Page not found or error"
-                    content_505 = ""
-                    stats['missing_505'] += 1
-                    if self.args.verbose:
-                        print(f"  - No MARCXML found")
+    def fetch_505_worker(self, entry):
+        """Worker for one Stage 3 entry. Returns (entry, status, content_505,
+        counts); counts is this record's stats contribution, kept local so
+        workers never share a mutable counter."""
+        counts = Counter(total_505_searches=1)
+        title = entry.title
+        lccn = entry.lccn
+
+        if not lccn:
+            return entry, "No LCCN available", "", counts
+
+        # Same LCCN can back several BibIDs; reuse the extracted 505
+        if lccn in self.lccn_to_505:
+            status, content_505, stat_key = self.lccn_to_505[lccn]
+            counts[stat_key] += 1
+            return entry, status, content_505, counts
+
+        cached = etag = None
+        if self.result_cache:
+            cached, etag, fresh = self.result_cache.get_entry(f"marc505:{lccn}")
+            if cached is not None and fresh:
+                status, content_505, stat_key = cached
+                self.lccn_to_505[lccn] = (status, content_505, stat_key)
+                counts[stat_key] += 1
+                return entry, status, content_505, counts
+            # A stale entry with an ETag gets revalidated with a conditional
+            # GET below instead of being downloaded and parsed from scratch
+
+        if self.verbose:
+            tqdm.write(f"Searching for: {title} (LCCN: {lccn})")
+
+        new_etag = None
+        response = self.fetch_marcxml(lccn, etag=etag)
+
+        if response is FAILED:
+            # Transient failure: memo it for this run so the same LCCN isn't
+            # retried immediately, but never persist it — the next run, with
+            # the network back, should fetch for real
+            if self.verbose:
+                tqdm.write(f"  - Request failed; not caching")
+            status, content_505, stat_key = "Page not found or error", "", 'missing_505'
+            self.lccn_to_505[lccn] = (status, content_505, stat_key)
+            counts[stat_key] += 1
+            return entry, status, content_505, counts
+
+        if response is None:
+            if self.verbose:
+                tqdm.write(f"  - No MARCXML found")
+            status, content_505, stat_key = "Page not found or error", "", 'missing_505'
+        elif response.status_code == 304:
+            # Record unchanged since we last extracted it; reuse the stale
+            # entry and restart its TTL without parsing anything
+            response.close()
+            if self.verbose:
+                tqdm.write(f"  - Not modified; reusing cached 505")
+            status, content_505, stat_key = cached
+            self.result_cache.touch(f"marc505:{lccn}")
+            self.lccn_to_505[lccn] = (status, content_505, stat_key)
+            counts[stat_key] += 1
+            return entry, status, content_505, counts
+        else:
+            new_etag = response.headers.get('ETag')
+            try:
+                if self.debug:
+                    # Debugging needs the full document on disk, so buffer it
+                    xml_content = response.content
+                    self.save_xml_for_debugging(xml_content, lccn)
+                    source = BytesIO(xml_content)
                 else:
-                    if self.args.verbose:
-                        print(f"  - Retrieved MARCXML content length: {len(xml_content)} characters")
-                    
-                    content_505 = self.extract_505_field(xml_content, lccn)
-                    
-                    if content_505 is None:
-                        status = "No 505 tag found"
-                        content_505 = ""
-                        stats['missing_505'] += 1
-                        if self.args.verbose:
-                            print(f"  - MARCXML found but no 505 tag")
-                    elif content_505 == "":
-                        status = "Empty 505 tag"
-                        stats['empty_505'] += 1
-                        if self.args.verbose:
-                            print(f"  - MARCXML found but 505 tag is empty")
-                    else:
-                        status = "Found"
-                        stats['found_505'] += 1
-                        if self.args.verbose:
-                            print(f"  - MARCXML and 505 tag data found")
-                            preview = content_505[:100] + "..." if len(content_505) > 100 else content_505
-                            print(f"  - Preview: {preview}")
-                
-                # CSV out
-                writer.writerow({
-                    'BibID': bibid,
-                    'Title': title,
-                    'ISBN': isbn,
-                    'LCCN': lccn,
-                    'Status': status,
-                    'Content_505': content_505
-                })
-                
-                pbar.update(1)
-            
+                    # Parse straight off the socket; decode_content undoes
+                    # any gzip transfer encoding before lxml sees the bytes
+                    response.raw.decode_content = True
+                    source = response.raw
+
+                content_505 = self.extract_505_field(source, lccn, counts)
+            finally:
+                # Early parser exit leaves the body partly unread; close()
+                # returns the connection to the pool either way
+                response.close()
+
+            if content_505 is None:
+                if self.verbose:
+                    tqdm.write(f"  - MARCXML found but no 505 tag")
+                status, content_505, stat_key = "No 505 tag found", "", 'missing_505'
+            elif content_505 == "":
+                if self.verbose:
+                    tqdm.write(f"  - MARCXML found but 505 tag is empty")
+                status, stat_key = "Empty 505 tag", 'empty_505'
+            else:
+                if self.verbose:
+                    tqdm.write(f"  - MARCXML and 505 tag data found")
+                    preview = content_505[:100] + "..." if len(content_505) > 100 else content_505
+                    tqdm.write(f"  - Preview: {preview}")
+                status, stat_key = "Found", 'found_505'
+
+        self.lccn_to_505[lccn] = (status, content_505, stat_key)
+        if self.result_cache:
+            self.result_cache.set(f"marc505:{lccn}", [status, content_505, stat_key],
+                                  etag=new_etag)
+        counts[stat_key] += 1
+        return entry, status, content_505, counts
+
+    def process_505_entries(self, entries):
+        processed = 0
+        with open(self.args.output, 'w', buffering=1 << 20, newline='', encoding='utf-8') as csv_file:
+            # Plain writer with positional tuples: no per-row dict build or
+            # field-name reordering in the hot loop
+            writer = csv.writer(csv_file)
+            writer.writerow(('BibID', 'Title', 'ISBN', 'LCCN', 'Status', 'Content_505'))
+
+            pbar = tqdm(desc="Retrieving 505 fields", unit="record",
+                        disable=not sys.stderr.isatty())
+            row_writer = RowWriter(writer, csv_file, pbar=pbar)
+            local = Counter()
+
+            window = self.concurrency * 2
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for entry, status, content_505, counts in \
+                        self.imap_bounded(executor, self.fetch_505_worker, entries, window,
+                                          ordered=False):
+                    processed += 1
+                    local.update(counts)
+
+                    # CSV out (batched by the writer thread); the entry's
+                    # field order is the column order, so this concatenation
+                    # is the full output row
+                    row_writer.put(entry + (status, content_505))
+
+            row_writer.close()
             pbar.close()
-            
+            self._merge_stats(local)
+
         print(f"\nDone! Results saved to {self.args.output}")
+        return processed
+
+    def print_summary(self, stats):
+        def pct(n, d):
+            # Empty inputs leave denominators at zero; show n/a, don't crash
+            return f"{n / d * 100:.1f}%" if d else "n/a"
 
-    def print_summary(self):
         print("\n===== SUMMARY =====")
-        
+
         if not self.args.skip_stage1:
+            total = stats['total_records']
             print("\nStage 1: Local Catalog Processing")
-            print(f"Total records processed: {stats['total_records']}")
-            print(f"Records with ISBN: {stats['records_with_isbn']} ({stats['records_with_isbn']/stats['total_records']*100:.1f}%)")
-            print(f"Records with LCCN: {stats['records_with_lccn']} ({stats['records_with_lccn']/stats['total_records']*100:.1f}%)")
-            print(f"Records with both ISBN and LCCN: {stats['records_with_both']} ({stats['records_with_both']/stats['total_records']*100:.1f}%)")
-            print(f"Records with neither ISBN nor LCCN: {stats['records_with_none']} ({stats['records_with_none']/stats['total_records']*100:.1f}%)")
+            print(f"Total records processed: {total}")
+            print(f"Records with ISBN: {stats['records_with_isbn']} ({pct(stats['records_with_isbn'], total)})")
+            print(f"Records with LCCN: {stats['records_with_lccn']} ({pct(stats['records_with_lccn'], total)})")
+            print(f"Records with both ISBN and LCCN: {stats['records_with_both']} ({pct(stats['records_with_both'], total)})")
+            print(f"Records with neither ISBN nor LCCN: {stats['records_with_none']} ({pct(stats['records_with_none'], total)})")
             print(f"Errors during processing: {stats['errors_stage1']}")
-        
+
         if not self.args.skip_stage2:
+            lookups = stats['items_requiring_lookup']
             print("\nStage 2: LCCN Lookup")
-            print(f"Items requiring LCCN lookup: {stats['items_requiring_lookup']}")
-            if stats['items_requiring_lookup'] > 0:
-                print(f"Successful lookups using ISBN: {stats['successful_isbn_lookups']} ({stats['successful_isbn_lookups']/stats['items_requiring_lookup']*100:.1f}%)")
-                print(f"Successful lookups using title: {stats['successful_title_lookups']} ({stats['successful_title_lookups']/stats['items_requiring_lookup']*100:.1f}%)")
-                print(f"Failed lookups: {stats['failed_lookups']} ({stats['failed_lookups']/stats['items_requiring_lookup']*100:.1f}%)")
-        
+            print(f"Items requiring LCCN lookup: {lookups}")
+            if lookups > 0:
+                print(f"Successful lookups using ISBN: {stats['successful_isbn_lookups']} ({pct(stats['successful_isbn_lookups'], lookups)})")
+                print(f"Successful lookups using title: {stats['successful_title_lookups']} ({pct(stats['successful_title_lookups'], lookups)})")
+                print(f"Failed lookups: {stats['failed_lookups']} ({pct(stats['failed_lookups'], lookups)})")
+
         if not self.args.skip_stage3:
+            searches = stats['total_505_searches']
             print("\nStage 3: 505 Field Retrieval")
-            print(f"Total records processed: {stats['total_505_searches']}")
-            if stats['total_505_searches'] > 0:
-                print(f"Records with 505 content: {stats['found_505']} ({stats['found_505']/stats['total_505_searches']*100:.1f}%)")
-                print(f"Records with empty 505 tags: {stats['empty_505']} ({stats['empty_505']/stats['total_505_searches']*100:.1f}%)")
-                print(f"Records with no 505 tags or errors: {stats['missing_505']} ({stats['missing_505']/stats['total_505_searches']*100:.1f}%)")
+            print(f"Total records processed: {searches}")
+            if searches > 0:
+                print(f"Records with 505 content: {stats['found_505']} ({pct(stats['found_505'], searches)})")
+                print(f"Records with empty 505 tags: {stats['empty_505']} ({pct(stats['empty_505'], searches)})")
+                print(f"Records with no 505 tags or errors: {stats['missing_505']} ({pct(stats['missing_505'], searches)})")
             print(f"Errors during processing: {stats['errors_stage3']}")
 
 def main():
@@ -840,11 +1573,20 @@ def main():
     parser.add_argument('--skip-stage1', action='store_true', help='Skip Stage 1: Local catalog processing')
     parser.add_argument('--skip-stage2', action='store_true', help='Skip Stage 2: LCCN lookup')
     parser.add_argument('--skip-stage3', action='store_true', help='Skip Stage 3: 505 field retrieval')
+    parser.add_argument('--no-pipeline', action='store_true',
+                        help='Run stages one after another with intermediate files instead of the streaming pipeline')
     
-    parser.add_argument('-d', '--delay', type=float, default=1.0, help='Delay between requests in seconds (default: 1.0)')
+    parser.add_argument('-d', '--delay', type=float, default=1.0,
+                        help='Minimum seconds between requests, enforced globally across all workers (default: 1.0)')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='Number of concurrent requests (default: 8)')
     parser.add_argument('-r', '--max-retries', type=int, default=3, help='Maximum number of retries for failed requests (default: 3)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
     parser.add_argument('--debug', action='store_true', help='Save raw XML for debugging')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the on-disk HTTP response and result caches')
+    parser.add_argument('--cache-path', default=None,
+                        help='Path for the result cache database (default: <temp>/result_cache.sqlite)')
+    parser.add_argument('--cache-ttl', type=float, default=30.0,
+                        help='Days before cached lookup results expire (default: 30)')
     parser.add_argument('--clean-temp', action='store_true', help='Clean up temporary files after processing')
     
     args = parser.parse_args()